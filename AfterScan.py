@@ -45,13 +45,19 @@ import os
 import time
 import subprocess as sp
 import json
+import hashlib
+import mmap
+import weakref
+try:
+    import orjson     # Optional, much faster than json for big project files
+except ImportError:
+    orjson = None
 from datetime import datetime
 import logging
 import sys
 import getopt
 import cv2
 import numpy as np
-from glob import glob
 import platform
 import re
 import shutil
@@ -134,6 +140,12 @@ general_config = {
 }
 
 project_config = default_project_config.copy()
+# Project config items with values from a limited set of options, interned when loading project settings
+InternedProjectConfigKeys = ("FilmType", "FrameFillType", "FFmpegPreset", "VideoFps", "VideoResolution",
+                             "FillBordersMode", "FakeFillType", "FramesToEncode")
+project_config_hash = None  # Hash of project config as last loaded/saved, to skip saving if unchanged
+LargeJsonFileSize = 256 * 1024  # From this size on, json files are mapped in memory instead of read (if orjson available)
+saved_json_hashes = {}  # Hash of each json file as last loaded/saved, to skip rewriting it if unchanged
 
 
 # Film hole search vars
@@ -147,31 +159,38 @@ SourceDir = ""
 TargetDir = ""
 file_type = 'jpg'
 file_type_out = file_type
-FrameInputFilenamePatternList_jpg = "picture-?????.jpg"
-HdrInputFilenamePatternList_jpg = "picture-?????.3.jpg"   # In HDR mode, use 3rd frame as guide
-LegacyHdrInputFilenamePatternList_jpg = "hdrpic-?????.3.jpg"   # In legacy HDR mode, use 3rd frame as guide
-FrameInputFilenamePatternList_png = "picture-?????.png"
-HdrInputFilenamePatternList_png = "picture-?????.3.png"   # In HDR mode, use 3rd frame as guide
-LegacyHdrInputFilenamePatternList_png = "hdrpic-?????.3.png"   # In legacy HDR mode, use 3rd frame as guide
+# Matches standard (picture-?????.jpg), HDR (picture-?????.3.jpg) and legacy HDR (hdrpic-?????.3.jpg) frames, jpg or png
+# Used to classify all files in source folder with a single directory scan
+SourceFilenameRegex = re.compile(r'^(picture|hdrpic)-(\d{5})(?:\.(\d))?\.(jpg|png)$')
 FrameInputFilenamePattern = "picture-%05d.%s"   # HDR frames using standard filename (2/12/2023)
 FrameHdrInputFilenamePattern = "picture-%05d.%1d.%s"   # HDR frames using standard filename (2/12/2023)
 FrameOutputFilenamePattern = "picture_out-%05d.%s"
 TitleOutputFilenamePattern = "picture_out(title)-%05d.%s"
 FrameOutputFilenamePattern_for_ffmpeg = "picture_out-%05d."
 TitleOutputFilenamePattern_for_ffmpeg = "picture_out(title)-%05d."
-FrameCheckOutputFilenamePattern = "picture_out-?????.%s"  # Req. for ffmpeg gen.
+FrameCheckOutputFilenamePrefix = "picture_out-"  # Req. for ffmpeg gen. (generated frames are picture_out-?????.ext)
 HdrSetInputFilenamePattern = "hdrpic-%05d.%1d.%s"   # Req. to fetch each HDR frame set
 HdrFilesOnly = False   # No HDR by default. Updated when building file list from input folder
 MergeMertens = None
 AlignMtb = None
 
 SourceDirFileList = []
+SourceDirFrameNumbers = np.empty(0, dtype=np.uint32)  # Frame number of each file in SourceDirFileList
+SourceDirHdrFilenames = set()  # Names of HDR subframes (picture-?????.n.jpg) in source folder, to avoid checking files one by one
 TargetDirFileList = []
 film_type = 'S8'
 frame_fill_type = 'fake'
 # Dimensions of frames in collection currently loaded: x, y (as it is needed often)
 frame_width = 2028
 frame_height = 1520
+# Decoded template images by (filename, modification time), shared by templates using the same file
+TemplateImageCache = weakref.WeakValueDictionary()
+# OpenCV functions/constants used for templates and resizing, bound once to skip module attribute lookups
+CvImread = cv2.imread
+CvResize = cv2.resize
+CvImreadGrayscale = cv2.IMREAD_GRAYSCALE
+CvInterArea = cv2.INTER_AREA
+CvInterLinear = cv2.INTER_LINEAR
 
 # Flow control vars
 ConvertLoopExitRequested = False
@@ -302,75 +321,156 @@ Classes
 #################
 """
 class Template:
+    __slots__ = ('name', 'filename', 'type', 'scale', 'position', 'scaled_position', 'size',
+                 'template', '_scaled_template', '_white_pixel_count', '_wb_proportion', 'scaled_dirty',
+                 'scaled_owned', 'loaded_filename', 'file_mtime', 'load_failed')
+
     def __init__(self, name, filename, type, position):
         self.name = name
         self.filename = filename
         self.type = type
         self.scale = frame_width/2028
         self.position = position
-        self.scaled_position = (int(self.position[0] * self.scale),
-                                int(self.position[1] * self.scale))
+        self.loaded_filename = None
+        self.file_mtime = None
+        self.load_failed = False
+        self.set_not_loaded()
+        self.refresh()
+
+    def set_not_loaded(self):
+        self.template = None
+        self._scaled_template = None
+        self._wb_proportion = 0.5
+        self.scaled_dirty = False
+        self.scaled_owned = False
         self.size = (0,0)
-        if os.path.isfile(filename):
-            self.template = cv2.imread(filename, cv2.IMREAD_GRAYSCALE)
-
-            self.scaled_template = resize_image(self.template, self.scale)
-            # Calculate the white on black proportion to help with detection
-            self.white_pixel_count = cv2.countNonZero(self.scaled_template)
-            total_pixels = self.scaled_template.size
-            self.wb_proportion = self.white_pixel_count / total_pixels
-            self.size = (self.template.shape[1],self.template.shape[0])
-            self.scaled_size = (int(self.size[0] * self.scale),
-                                int(self.size[1] * self.scale))
-        else:
-            self.template = None
-            self.scaled_template = None
-            self.wb_proportion = 0.5
-            self.size = (0,0)
-            self.scaled_size = (0,0)
+
+    # Scaled template (and its white pixel count) only calculated when first needed after a refresh
+    @property
+    def scaled_template(self):
+        if self.scaled_dirty:
+            self.update_scaled()
+        return self._scaled_template
+
+    @property
+    def scaled_size(self):
+        # Taken from the scaled template itself, so that it always matches what resize_image produced
+        scaled_template = self.scaled_template
+        return (0,0) if scaled_template is None else (scaled_template.shape[1], scaled_template.shape[0])
+
+    @property
+    def white_pixel_count(self):
+        if self.scaled_dirty:
+            self.update_scaled()
+        return self._white_pixel_count
+
+    @property
+    def wb_proportion(self):
+        if self.scaled_dirty:
+            self.update_scaled()
+        return self._wb_proportion
+
+    def update_scaled(self):
+        self.scaled_dirty = False
+        # Previous scaled template is reused as destination buffer when size matches
+        # (never the template itself, as it can be shared with other templates)
+        dst = self._scaled_template if self.scaled_owned else None
+        # INTER_AREA looks better when shrinking templates (too slow for per-frame previews, so only used here)
+        interpolation = CvInterArea if self.scale < 1 else CvInterLinear
+        self._scaled_template = np.ascontiguousarray(resize_image(self.template, self.scale, dst=dst,
+                                                                  interpolation=interpolation), dtype=np.uint8)
+        self.scaled_owned = self._scaled_template is not self.template
+        # Calculate the white on black proportion to help with detection
+        self._white_pixel_count = int(np.count_nonzero(self._scaled_template))
+        total_pixels = self._scaled_template.size
+        self._wb_proportion = self._white_pixel_count / total_pixels
+
+    @staticmethod
+    def load_image(filename, file_mtime):
+        # Templates pointing to the same (unmodified) file share the decoded image, which is never modified
+        key = (filename, file_mtime)
+        img = TemplateImageCache.get(key)
+        if img is None:
+            img = CvImread(filename, CvImreadGrayscale)
+            if img is None:
+                return None
+            # Keep templates as contiguous uint8 so that OpenCV uses its vectorized paths (no-op if already so)
+            img = np.ascontiguousarray(img, dtype=np.uint8)
+            TemplateImageCache[key] = img
+        return img
 
     def refresh(self):
-        self.template = cv2.imread(self.filename, cv2.IMREAD_GRAYSCALE)
-        self.scaled_template = resize_image(self.template, self.scale)
-        self.white_pixel_count = cv2.countNonZero(self.scaled_template)
-        total_pixels = self.scaled_template.size
-        self.wb_proportion = self.white_pixel_count / total_pixels
+        new_scale = frame_width/2028
+        self.scaled_position = (int(self.position[0] * new_scale),
+                                int(self.position[1] * new_scale))
+        try:
+            file_mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            file_mtime = None
+        same_file = self.filename == self.loaded_filename and file_mtime == self.file_mtime
+        # Same file, unmodified: either already known to be missing/unreadable, or already scaled at this scale
+        if same_file and (self.load_failed or (self.template is not None and new_scale == self.scale)):
+            return
+        self.scale = new_scale
+        self.loaded_filename = self.filename
+        self.file_mtime = file_mtime
+        # Decoded template kept in memory, only read again from disk if file changed
+        if not same_file or self.template is None:
+            self.template = self.load_image(self.filename, file_mtime) if file_mtime is not None else None
+        self.load_failed = self.template is None
+        if self.load_failed:
+            logging.debug(f"Template file {self.filename} missing or unreadable")
+            self.set_not_loaded()
+            return
+        self.scaled_dirty = True
         self.size = (self.template.shape[1], self.template.shape[0])
-        self.scaled_size = (int(self.size[0] * self.scale),
-                            int(self.size[1] * self.scale))
-        self.scaled_position = (int(self.position[0] * self.scale),
-                                int(self.position[1] * self.scale))
+
+
+class SourceDirScan:
+    def __init__(self, file_list, legacy_hdr_file_list, num_hdr_files, hdr_filenames, file_type_out):
+        # Lists stored as tuples, as they are shared with SourceDirFileList and not meant to be modified
+        self.file_list = tuple(file_list)
+        self.frame_numbers = self.get_frame_numbers(file_list)
+        self.legacy_hdr_file_list = tuple(legacy_hdr_file_list)
+        self.legacy_hdr_frame_numbers = self.get_frame_numbers(legacy_hdr_file_list)
+        self.num_hdr_files = num_hdr_files
+        self.hdr_filenames = hdr_filenames
+        self.file_type_out = file_type_out
+
+    @staticmethod
+    def get_frame_numbers(file_list):
+        # Extract frame numbers from filenames once ('picture-?????...' or 'hdrpic-?????...'), keep them in a parallel array
+        return np.fromiter((int(os.path.basename(f).split('-', 1)[1][:5]) for f in file_list),
+                           dtype=np.uint32, count=len(file_list))
 
 
 class TemplateList:
+    __slots__ = ('templates', 'active_template')
+
     def __init__(self):
-        self.templates = []
+        self.templates = {}    # Indexed by (type, name)
         self.active_template = None  # Initialize active_element to None
 
     def add(self, name, filename, type, position):
-        exists = False
-        for t in self.templates:
-            if t.name == name and t.type == type:  # If already exist, update it
-                self.active_template = t
-                exists = True
-                break
-        if exists:
-            t.filename = filename
-            t.position = position
-            t.refresh()
-            target = t
+        key = (sys.intern(type), sys.intern(name))
+        target = self.templates.get(key)
+        if target is not None:  # If already exist, update it
+            target.filename = filename
+            target.position = position
+            target.refresh()
         else:
-            target = Template(name, filename, type, position)
-            self.templates.append(target)
+            target = Template(key[1], filename, key[0], position)
+            self.templates[key] = target
         self.active_template = target   # Set template just added as active
         return target
 
     def get_all(self):
-        return self.templates
+        return list(self.templates.values())
 
     def remove(self, template):
-        if template in self.templates:
-            self.templates.remove(template)
+        key = (template.type, template.name)
+        if self.templates.get(key) is template:
+            del self.templates[key]
             if template == self.active_template:
                 self.active_template = None  # Reset active_element if removed
             return True
@@ -378,17 +478,15 @@ class TemplateList:
             return False
 
     def set_active(self, type, name):
-        for t in self.templates:
-            if t.type == type and t.name == name:
-                self.active_template = t
-                return True
+        t = self.templates.get((type, name))
+        if t is not None:
+            self.active_template = t
+            return True
         return False
 
     def get_template(self, type, name):
-        for t in self.templates:
-            if t.type == type and t.name == name:
-                return t.scaled_template
-        return None
+        t = self.templates.get((type, name))
+        return t.scaled_template if t is not None else None
 
     def get_active(self):
         return self.active_template
@@ -428,7 +526,10 @@ class TemplateList:
         return self.active_template.wb_proportion
 
     def set_active_wb_proportion(self, proportion):
-        self.active_template.wb_proportion = proportion
+        t = self.active_template
+        if t.scaled_dirty:  # Make sure a pending lazy update does not overwrite the value set
+            t.update_scaled()
+        t._wb_proportion = proportion
 
 
 
@@ -439,15 +540,16 @@ Utility functions
 """
 
 
+# Regular expression for identifying a number
+# Compiled once, as it is checked for each line of ffmpeg output
+NumberRegex = re.compile('^[0-9]+$')
+
+
 # Define a function for
 # identifying a Digit
 def is_a_number(string):
-    # Make a regular expression
-    # for identifying a digit
-    regex = '^[0-9]+$'
-    # pass the regular expression
-    # and the string in search() method
-    if (re.search(regex, string)):
+    # pass the string to the search() method of the precompiled regular expression
+    if NumberRegex.search(string):
         return True
     else:
         return False
@@ -465,6 +567,58 @@ Configuration file support functions
 """
 
 
+def load_json_file(filename):
+    global saved_json_hashes
+    with open(filename, 'rb') as f:
+        if orjson is not None and os.fstat(f.fileno()).st_size >= LargeJsonFileSize:
+            # Map big files instead of reading them, to avoid an additional copy of the whole file in memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                with memoryview(mapped_file) as contents:
+                    saved_json_hashes[filename] = hashlib.blake2b(contents, digest_size=16).digest()
+                    return orjson.loads(contents)
+        contents = f.read()
+    saved_json_hashes[filename] = hashlib.blake2b(contents, digest_size=16).digest()
+    # Use orjson if installed, fall back to standard json module otherwise
+    if orjson is not None:
+        return orjson.loads(contents)
+    else:
+        return json.loads(contents)
+
+
+def encode_json(data):
+    # Encode whole file in memory, to write it in one go instead of one small write per token
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        return json.dumps(data).encode()
+
+
+def save_json_file(filename, data, backup_filename=None):
+    global saved_json_hashes
+    contents = encode_json(data)
+    # Do not rewrite file if contents are the same as when last loaded or saved
+    contents_hash = hashlib.blake2b(contents, digest_size=16).digest()
+    if saved_json_hashes.get(filename) == contents_hash and os.path.isfile(filename):
+        logging.debug(f"File {filename} unchanged, not saving")
+        return
+    # Write to a temporary file first, and replace the target once complete, so that an
+    # interrupted save never leaves a truncated file behind. Previous file kept as backup if requested
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'wb') as f:
+        f.write(contents)
+    if backup_filename is not None and os.path.isfile(filename):
+        os.replace(filename, backup_filename)
+    os.replace(temp_filename, filename)
+    saved_json_hashes[filename] = contents_hash
+
+
+def get_project_config_hash():
+    # Hash serialized config, so that tuples and lists (as loaded from json) compare the same
+    # Save date is left out, as it changes on each save
+    config_to_hash = {key: value for key, value in project_config.items() if key != "ProjectConfigDate"}
+    return hashlib.blake2b(encode_json(config_to_hash), digest_size=16).digest()
+
+
 def set_project_defaults():
     global project_config
     global perform_cropping, generate_video, resolution_dropdown_selected
@@ -520,8 +674,7 @@ def save_general_config():
     except Exception as e:
         logging.debug(f"Error (expected) while trying to save template popup window geometry: {e}")
     if not IgnoreConfig:
-        with open(general_config_filename, 'w+') as f:
-            json.dump(general_config, f)
+        save_json_file(general_config_filename, general_config)
 
 
 def load_general_config():
@@ -530,15 +683,14 @@ def load_general_config():
 
     # Check if persisted data file exist: If it does, load it
     if not IgnoreConfig and os.path.isfile(general_config_filename):
-        persisted_data_file = open(general_config_filename)
-        general_config = json.load(persisted_data_file)
-        persisted_data_file.close()
+        general_config = load_json_file(general_config_filename)
     else:   # No project config file. Set empty config to force defaults
         general_config = {}
 
     logging.debug("Reading general config")
-    for item in general_config:
-        logging.debug("%s=%s", item, str(general_config[item]))
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for item, value in general_config.items():
+            logging.debug("%s=%s", item, value)
 
 
 def decode_general_config():
@@ -548,7 +700,7 @@ def decode_general_config():
     global general_config
 
     if 'SourceDir' in general_config:
-        SourceDir = general_config["SourceDir"]
+        SourceDir = sys.intern(general_config["SourceDir"])
         # If directory in configuration does not exist, set current working dir
         if not os.path.isdir(SourceDir):
             SourceDir = ""
@@ -576,18 +728,12 @@ def save_project_settings():
     global project_settings, project_settings_filename, project_settings_backup_filename
 
     if not IgnoreConfig:
-        # Delete existing backup file
-        if os.path.isfile(project_settings_backup_filename):
-            os.remove(project_settings_backup_filename)
-        # Rename current project file as backup
-        if os.path.isfile(project_settings_filename):
-            os.rename(project_settings_filename, project_settings_backup_filename)
-            logging.debug("Saving project settings:")
+        logging.debug("Saving project settings:")
         # Create list with global version info
         global_info = {'data_version': __data_version__, 'code_version': __version__, 'save_date': str(datetime.now())}
         list_to_save = [global_info, project_settings]
-        with open(project_settings_filename, 'w+') as f:
-            json.dump(list_to_save, f)
+        # Current project file is kept as backup
+        save_json_file(project_settings_filename, list_to_save, project_settings_backup_filename)
 
 
 def load_project_settings():
@@ -599,16 +745,15 @@ def load_project_settings():
     error_while_loading = False
 
     if not IgnoreConfig and os.path.isfile(project_settings_filename):
-        f = open(project_settings_filename)
         try:
-            saved_list = json.load(f)
+            saved_list = load_json_file(project_settings_filename)
         except Exception as e:
             logging.debug(f"Error while opening projects json file; {e}")
             error_while_loading = True
-        f.close()
         if not error_while_loading:
             # Check if project if legacy, since we will not handle it
-            if isinstance(saved_list, dict):   # Old version of json files were directly a dictionary
+            # Old version of json files were directly a dictionary, new version is a [header, projects] list
+            if not isinstance(saved_list, list) or len(saved_list) != 2:
                 tk.messagebox.showerror(
                     "Invalid project file",
                     f"The project file {project_settings_filename} saved in disk is invalid."
@@ -617,7 +762,14 @@ def load_project_settings():
             else:
                 # New version is a list
                 logging.info(f"Loading project file: {saved_list[0]['data_version']},  {saved_list[0]['code_version']},  {saved_list[0]['save_date']}")
-                project_settings = saved_list[1]
+                # Intern project folders: Same strings are used as SourceDir and as keys to look up projects
+                project_settings = {sys.intern(folder): settings for folder, settings in saved_list[1].items()}
+                # Intern also values taken from a small set of options, repeated for all projects
+                for settings in project_settings.values():
+                    for key in InternedProjectConfigKeys:
+                        value = settings.get(key)
+                        if isinstance(value, str):
+                            settings[key] = sys.intern(value)
                 projects_loaded = True
                 # Perform some cleanup, in case projects have been deleted
                 project_folders = list(project_settings.keys())  # freeze keys iterator into a list
@@ -649,6 +801,7 @@ def save_project_config():
     global video_filename_str, video_title_str
     global frame_from_str, frame_to_str
     global perform_denoise, perform_sharpness, perform_gamma_correction
+    global project_config_hash
 
     # Do not save if current project comes from batch job
     if not project_config_from_file or IgnoreConfig:
@@ -659,7 +812,6 @@ def save_project_config():
     project_config["CurrentFrame"] = CurrentFrame
     project_config["skip_frame_regeneration"] = skip_frame_regeneration.get()
     project_config["FFmpegPreset"] = ffmpeg_preset.get()
-    project_config["ProjectConfigDate"] = str(datetime.now())
     project_config["PerformCropping"] = perform_cropping.get()
     project_config["PerformDenoise"] = perform_denoise.get()
     project_config["PerformSharpness"] = perform_sharpness.get()
@@ -686,12 +838,20 @@ def save_project_config():
     # with open(project_config_filename, 'w+') as f:
     #     json.dump(project_config, f)
 
+    # Skip rewriting project settings file if nothing changed since project was loaded or last saved
+    config_hash = get_project_config_hash()
+    if config_hash == project_config_hash and SourceDir in project_settings:
+        logging.debug("Project config unchanged, not saving")
+        return
+    project_config["ProjectConfigDate"] = str(datetime.now())
+
     update_project_settings()
     save_project_settings()
+    project_config_hash = config_hash
 
 def load_project_config():
     global SourceDir
-    global project_config, project_config_from_file
+    global project_config, project_config_from_file, project_config_hash
     global project_config_basename, project_config_filename
     global project_settings
     global default_project_config
@@ -703,19 +863,21 @@ def load_project_config():
 
     if SourceDir in project_settings:
         logging.debug("Loading project config from consolidated project settings")
-        project_config |= project_settings[SourceDir].copy()
+        project_config |= project_settings[SourceDir]
     elif os.path.isfile(project_config_filename):
         logging.debug("Loading project config from dedicated project config file")
-        persisted_data_file = open(project_config_filename)
-        project_config |= json.load(persisted_data_file)
-        persisted_data_file.close()
+        project_config |= load_json_file(project_config_filename)
     else:  # No project config file. Set empty config to force defaults
         logging.debug("No project config exists, initializing defaults")
         project_config = default_project_config.copy()
         project_config['SourceDir'] = SourceDir
 
-    for item in project_config:
-        logging.debug("%s=%s", item, str(project_config[item]))
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for item, value in project_config.items():
+            logging.debug("%s=%s", item, value)
+
+    # Keep hash of config as loaded, to avoid saving it again if not modified
+    project_config_hash = get_project_config_hash()
 
     # Allow to determine source of current project, to avoid
     # saving it in case of batch processing
@@ -747,7 +909,7 @@ def decode_project_config():
     global temp_dir
 
     if 'SourceDir' in project_config:
-        SourceDir = project_config["SourceDir"]
+        SourceDir = sys.intern(project_config["SourceDir"])
         project_name = os.path.split(SourceDir)[-1].replace(',', ';')
         # If directory in configuration does not exist, set current working dir
         if not os.path.isdir(SourceDir):
@@ -1125,20 +1287,17 @@ def save_job_list():
     global job_list, job_list_filename
 
     if not IgnoreConfig:
-        with open(job_list_filename, 'w+') as f:
-            json.dump(job_list, f)
+        save_json_file(job_list_filename, job_list)
 
 
 def load_job_list():
     global job_list, job_list_filename, job_list_listbox
 
     if not IgnoreConfig and os.path.isfile(job_list_filename):
-        f = open(job_list_filename)
-        job_list = json.load(f)
+        job_list = load_json_file(job_list_filename)
         for entry in job_list:
             job_list_listbox.insert('end', entry)   # Add to listbox
             job_list[entry]['attempted'] = job_list[entry]['done']  # Add default value for new json field
-        f.close()
         idx = 0
         for entry in job_list:
             job_list_listbox.itemconfig(idx, fg='black' if job_list[entry]['done'] == False else 'green')
@@ -1381,7 +1540,7 @@ def set_source_folder():
             "Source folder cannot be the same as target folder.")
         return
     else:
-        SourceDir = aux_dir
+        SourceDir = sys.intern(aux_dir)
         frames_source_dir.delete(0, 'end')
         frames_source_dir.insert('end', SourceDir)
         frames_source_dir.after(100, frames_source_dir.xview_moveto, 1)
@@ -1999,7 +2158,7 @@ def scale_display_update():
         return
     # If HDR mode, pick the lightest frame to select rectangle
     file3 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (frame_to_display + 1, 2, file_type))
-    if os.path.isfile(file3):  # If hdr frames exist, add them
+    if os.path.basename(file3) in SourceDirHdrFilenames:  # If hdr frames exist, add them
         file = file3
     else:
         file = SourceDirFileList[frame_to_display]
@@ -2227,7 +2386,7 @@ def select_rectangle_area(is_cropping=False):
     file = SourceDirFileList[CurrentFrame]
     # If HDR mode, pick the lightest frame to select rectangle
     file3 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (CurrentFrame + 1, 2, file_type))
-    if os.path.isfile(file3):  # If hdr frames exist, add them
+    if os.path.basename(file3) in SourceDirHdrFilenames:  # If hdr frames exist, add them
         file = file3
 
     # load the image, clone it, and setup the mouse callback function
@@ -2460,7 +2619,7 @@ def select_custom_template():
             # Extract template from image
             file = SourceDirFileList[CurrentFrame]
             file3 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (CurrentFrame + 1, 2, file_type))
-            if os.path.isfile(file3):  # If hdr frames exist, add them
+            if os.path.basename(file3) in SourceDirHdrFilenames:  # If hdr frames exist, add them
                 file = file3
             img = cv2.imread(file, cv2.IMREAD_UNCHANGED)
             img = crop_image(img, RectangleTopLeft, RectangleBottomRight)
@@ -2719,15 +2878,29 @@ def clear_image():
     draw_capture_canvas.delete('all')
 
 
-def resize_image(img, ratio):
+def resize_image(img, ratio, dst=None, interpolation=CvInterLinear):
+    # Nothing to do at full size
+    if ratio == 1:
+        return img
     # Calculate the proportional size of original image
-    width = int(img.shape[1] * ratio)
-    height = int(img.shape[0] * ratio)
+    factor = round(1 / ratio) if ratio < 1 else 0
+    if factor > 1 and abs(1 / ratio - factor) < 1e-6:
+        # Exact integer reduction (e.g. 0.5): integer math avoids float truncation errors. Also, if caller asks for
+        # INTER_AREA (only templates do) and image dimensions are multiples of the factor, OpenCV uses its fast
+        # block averaging path. Previews use the default INTER_LINEAR, which has no such path
+        width = img.shape[1] // factor
+        height = img.shape[0] // factor
+    else:
+        width = int(img.shape[1] * ratio)
+        height = int(img.shape[0] * ratio)
 
     dsize = (width, height)
 
     # resize image
-    return cv2.resize(img, dsize)
+    # Reuse caller provided buffer if it matches, saves an allocation per call
+    if dst is not None and dst.shape == (height, width) + img.shape[2:] and dst.dtype == img.dtype:
+        return CvResize(img, dsize, dst=dst, interpolation=interpolation)
+    return CvResize(img, dsize, interpolation=interpolation)
 
 
 def get_image_left_stripe(img):
@@ -2739,9 +2912,10 @@ def get_image_left_stripe(img):
     # Default values defined at display initialization time, after source
     # folder is defined
     # If template wider than search area, make search area bigger (including +100 to have some margin)
-    if template_list.get_active_size()[0] > HoleSearchBottomRight[0] - HoleSearchTopLeft[0]:
+    template_width = template_list.get_active_size()[0]
+    if template_width > HoleSearchBottomRight[0] - HoleSearchTopLeft[0]:
         logging.debug(f"Making left stripe wider: {HoleSearchBottomRight[0] - HoleSearchTopLeft[0]}")
-        HoleSearchBottomRight = (HoleSearchBottomRight[0] + template_list.get_active_size()[0], HoleSearchBottomRight[1])
+        HoleSearchBottomRight = (HoleSearchBottomRight[0] + template_width, HoleSearchBottomRight[1])
         logging.debug(f"Making left stripe wider: {HoleSearchBottomRight[0] - HoleSearchTopLeft[0]}")
     horizontal_range = (HoleSearchTopLeft[0], HoleSearchBottomRight[0])
     vertical_range = (HoleSearchTopLeft[1], HoleSearchBottomRight[1])
@@ -3001,10 +3175,69 @@ def system_suspend():
         logging.error("Cannot suspend.")
 
 
+def scan_source_dir(source_dir):
+    # Does not depend on UI nor globals: single pass over the folder, UI handling done by caller
+    # All files in source folder are classified in a single pass, instead of one glob per pattern
+    file_list_jpg = []
+    file_list_png = []
+    hdr_file_list_jpg = []
+    hdr_file_list_png = []
+    legacy_hdr_file_list_jpg = []
+    legacy_hdr_file_list_png = []
+    hdr_filenames = set()
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            match = SourceFilenameRegex.match(entry.name)
+            if match is None:
+                continue
+            prefix, number, subframe, extension = match.groups()
+            if subframe is not None and prefix == 'picture':
+                hdr_filenames.add(entry.name)
+            if subframe is None:
+                if prefix == 'picture':
+                    if extension == 'jpg':
+                        file_list_jpg.append(entry.path)
+                    else:
+                        file_list_png.append(entry.path)
+            elif subframe == '3':   # In HDR mode (legacy or not), use 3rd frame as guide
+                if prefix == 'picture':
+                    if extension == 'jpg':
+                        hdr_file_list_jpg.append(entry.path)
+                    else:
+                        hdr_file_list_png.append(entry.path)
+                else:
+                    if extension == 'jpg':
+                        legacy_hdr_file_list_jpg.append(entry.path)
+                    else:
+                        legacy_hdr_file_list_png.append(entry.path)
+
+    # Try first with standard scan filename template
+    if len(file_list_jpg) == 0:     # Only use PNG if there are no JPG at all
+        file_list = sorted(file_list_png)
+        file_type_out = 'png'  # If we have png files in the input, we default to png for the output
+    else:
+        file_list = sorted(file_list_jpg)
+        file_type_out = 'jpg'
+
+    if len(hdr_file_list_png) != 0:
+        file_type_out = 'png'   # If we have png files in the input, we default to png for the output
+    elif len(hdr_file_list_jpg) != 0:
+        file_type_out = 'jpg'
+
+    legacy_hdr_file_list = sorted(legacy_hdr_file_list_jpg + legacy_hdr_file_list_png)
+    if len(legacy_hdr_file_list_png) != 0:
+        file_type_out = 'png'   # If we have png files in the input, we default to png for the output
+    elif len(legacy_hdr_file_list_jpg) != 0:
+        file_type_out = 'jpg'
+
+    return SourceDirScan(file_list, legacy_hdr_file_list, len(hdr_file_list_jpg) + len(hdr_file_list_png),
+                         frozenset(hdr_filenames), file_type_out)
+
+
 def get_source_dir_file_list():
     global SourceDir, frame_width, frame_height
     global project_config
-    global SourceDirFileList
+    global SourceDirFileList, SourceDirFrameNumbers, SourceDirHdrFilenames
     global CurrentFrame, first_absolute_frame, last_absolute_frame
     global frame_slider
     global area_select_image_factor, screen_height
@@ -3016,47 +3249,15 @@ def get_source_dir_file_list():
     if not os.path.isdir(SourceDir):
         return
 
-    # Try first with standard scan filename template
-    SourceDirFileList_jpg = list(glob(os.path.join(
-        SourceDir,
-        FrameInputFilenamePatternList_jpg)))
-    if len(SourceDirFileList_jpg) == 0:     # Only try to read if there are no JPG at all
-        SourceDirFileList_png = list(glob(os.path.join(
-            SourceDir,
-            FrameInputFilenamePatternList_png)))
-        SourceDirFileList = sorted(SourceDirFileList_png)
-        file_type_out = 'png'  # If we have png files in the input, we default to png for the output
-    else:
-        SourceDirFileList = sorted(SourceDirFileList_jpg)
-        file_type_out = 'jpg'
-
-    SourceDirHdrFileList_jpg = list(glob(os.path.join(
-        SourceDir,
-        HdrInputFilenamePatternList_jpg)))
-    SourceDirHdrFileList_png = list(glob(os.path.join(
-        SourceDir,
-        HdrInputFilenamePatternList_png)))
-    SourceDirHdrFileList = sorted(SourceDirHdrFileList_jpg + SourceDirHdrFileList_png)
-    if len(SourceDirHdrFileList_png) != 0:
-        file_type_out = 'png'   # If we have png files in the input, we default to png for the output
-    elif len(SourceDirHdrFileList_jpg) != 0:
-        file_type_out = 'jpg'
+    scan = scan_source_dir(SourceDir)
+    SourceDirFileList = scan.file_list
+    SourceDirFrameNumbers = scan.frame_numbers
+    SourceDirHdrFilenames = scan.hdr_filenames
+    file_type_out = scan.file_type_out
 
-    SourceDirLegacyHdrFileList_jpg = list(glob(os.path.join(
-        SourceDir,
-        LegacyHdrInputFilenamePatternList_jpg)))
-    SourceDirLegacyHdrFileList_png = list(glob(os.path.join(
-        SourceDir,
-        LegacyHdrInputFilenamePatternList_png)))
-    SourceDirLegacyHdrFileList = sorted(SourceDirLegacyHdrFileList_jpg + SourceDirLegacyHdrFileList_png)
-    if len(SourceDirLegacyHdrFileList_png) != 0:
-        file_type_out = 'png'   # If we have png files in the input, we default to png for the output
-    elif len(SourceDirLegacyHdrFileList_jpg) != 0:
-        file_type_out = 'jpg'
-
-    NumFiles = len(SourceDirFileList)
-    NumHdrFiles = len(SourceDirHdrFileList)
-    NumLegacyHdrFiles = len(SourceDirLegacyHdrFileList)
+    NumFiles = len(scan.file_list)
+    NumHdrFiles = scan.num_hdr_files
+    NumLegacyHdrFiles = len(scan.legacy_hdr_file_list)
     if NumFiles != 0 and NumLegacyHdrFiles != 0:
         if tk.messagebox.askyesno(
                 "Frame conflict",
@@ -3065,9 +3266,11 @@ def get_source_dir_file_list():
                 f"Do you want to continue using the {'standard' if NumFiles > NumLegacyHdrFiles else 'HDR'} files?.\r\n"
                 f"You might want ot clean up that source folder, it is strongly recommended to have only a single type of frames in the source folder."):
                     if NumLegacyHdrFiles > NumFiles:
-                        SourceDirFileList = SourceDirLegacyHdrFileList
+                        SourceDirFileList = scan.legacy_hdr_file_list
+                        SourceDirFrameNumbers = scan.legacy_hdr_frame_numbers
     elif NumFiles == 0 and NumHdrFiles == 0: # Only Legacy HDR
-        SourceDirFileList = SourceDirLegacyHdrFileList
+        SourceDirFileList = scan.legacy_hdr_file_list
+        SourceDirFrameNumbers = scan.legacy_hdr_frame_numbers
 
     if len(SourceDirFileList) == 0:
         tk.messagebox.showerror("Error!",
@@ -3083,10 +3286,7 @@ def get_source_dir_file_list():
     if CurrentFrame >= len(SourceDirFileList):
         CurrentFrame = 0
 
-    # Extract frame number from filename
-    temp = re.findall(r'\d+', os.path.basename(SourceDirFileList[0]))
-    numbers = list(map(int, temp))
-    first_absolute_frame = numbers[0]
+    first_absolute_frame = int(SourceDirFrameNumbers[0])
     last_absolute_frame = first_absolute_frame + len(SourceDirFileList)-1
     frame_slider.config(from_=0, to=len(SourceDirFileList)-1,
                         label='Global:'+str(CurrentFrame+first_absolute_frame))
@@ -3122,6 +3322,16 @@ def get_source_dir_file_list():
     return len(SourceDirFileList)
 
 
+def list_target_dir_frames():
+    # Same as globbing 'picture_out-?????.ext', but using plain string checks instead of fnmatch
+    suffix = '.' + file_type_out
+    name_length = len(FrameCheckOutputFilenamePrefix) + 5 + len(suffix)
+    with os.scandir(TargetDir) as entries:
+        return sorted(entry.path for entry in entries
+                      if len(entry.name) == name_length and entry.name.startswith(FrameCheckOutputFilenamePrefix)
+                      and entry.name.endswith(suffix))
+
+
 def get_target_dir_file_list():
     global TargetDir
     global TargetDirFileList
@@ -3131,8 +3341,7 @@ def get_target_dir_file_list():
     if not os.path.isdir(TargetDir):
         return
 
-    TargetDirFileList = sorted(list(glob(os.path.join(
-        TargetDir, FrameCheckOutputFilenamePattern % file_type_out))))
+    TargetDirFileList = list_target_dir_frames()
     if len(TargetDirFileList) != 0:
         # read image
         img = cv2.imread(TargetDirFileList[0], cv2.IMREAD_UNCHANGED)
@@ -3214,21 +3423,11 @@ Core top level functions
 ########################
 """
 
-def get_frame_number_from_filename(filename):
-    numbers = re.findall(r'\d\d\d\d\d', filename)
-
-    if len(numbers) >= 1:
-        return int(numbers[-1])
-    else:
-        # Return a default value or handle the case where no numbers are found
-        return None
-
-
 def start_convert():
     global ConvertLoopExitRequested, ConvertLoopRunning
     global generate_video
     global video_writer
-    global SourceDirFileList
+    global SourceDirFileList, SourceDirFrameNumbers
     global TargetVideoFilename
     global CurrentFrame, StartFrame
     global encode_all_frames
@@ -3258,7 +3457,7 @@ def start_convert():
         if encode_all_frames.get():
             StartFrame = 0
             #frames_to_encode = len(SourceDirFileList)
-            frames_to_encode = get_frame_number_from_filename(SourceDirFileList[-1]) - get_frame_number_from_filename(SourceDirFileList[0]) + 1
+            frames_to_encode = int(SourceDirFrameNumbers[-1]) - int(SourceDirFrameNumbers[0]) + 1
         else:
             StartFrame = int(frame_from_str.get())
             frames_to_encode = int(frame_to_str.get()) - int(frame_from_str.get()) + 1
@@ -3431,20 +3630,20 @@ def frame_encode(frame_idx, id):
         img_ref = img   # Reference image is the same image for standard capture
         # Check if HDR frames exist. Can handle between 2 and 5
         file2 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (frame_idx + first_absolute_frame, 2, file_type))
-        if os.path.isfile(file2):   # If hdr frames exist, add them
+        if os.path.basename(file2) in SourceDirHdrFilenames:   # If hdr frames exist, add them
             images_to_merge.clear()
             images_to_merge.append(img_ref)     # Add first frame
             img_ref_aux = img_ref
             img_ref = cv2.imread(file2, cv2.IMREAD_UNCHANGED) # Override stabilization reference with HDR#2
             images_to_merge.append(img_ref)
             file3 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (frame_idx + first_absolute_frame, 3, file_type))
-            if os.path.isfile(file3):  # If hdr frames exist, add them
+            if os.path.basename(file3) in SourceDirHdrFilenames:  # If hdr frames exist, add them
                 images_to_merge.append(cv2.imread(file3, cv2.IMREAD_UNCHANGED))
                 file4 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (frame_idx + first_absolute_frame, 4, file_type))
-                if os.path.isfile(file4):  # If hdr frames exist, add them
+                if os.path.basename(file4) in SourceDirHdrFilenames:  # If hdr frames exist, add them
                     images_to_merge.append(cv2.imread(file4, cv2.IMREAD_UNCHANGED))
                     file5 = os.path.join(SourceDir, FrameHdrInputFilenamePattern % (frame_idx + first_absolute_frame, 5, file_type))
-                    if os.path.isfile(file5):  # If hdr frames exist, add them
+                    if os.path.basename(file5) in SourceDirHdrFilenames:  # If hdr frames exist, add them
                         images_to_merge.append(cv2.imread(file5, cv2.IMREAD_UNCHANGED))
 
             AlignMtb.process(images_to_merge, images_to_merge)
@@ -3617,8 +3816,7 @@ def frame_generation_loop():
         last_displayed_image = 0
         win.update()
         # Refresh Target dir file list
-        TargetDirFileList = sorted(list(glob(os.path.join(
-            TargetDir, FrameCheckOutputFilenamePattern % file_type_out))))
+        TargetDirFileList = list_target_dir_frames()
         if GenerateCsv:
             CsvFile.close()
             name, ext = os.path.splitext(CsvPathName)
@@ -4776,30 +4974,26 @@ def build_ui():
     # Add job button
     add_job_btn = Button(job_list_btn_frame, text="Add job", width=12, height=1,
                     command=job_list_add_current, activebackground='green',
-                    activeforeground='white', wraplength=100, font=("Arial", FontSize))
+                    activeforeground='white', wraplength=100, font=("Arial", FontSize), name='add_job_btn')
     add_job_btn.pack(side=TOP, padx=2, pady=2)
-    as_tooltips.add(add_job_btn, "Add to job list a new job using the current settings defined on the right area of the AfterScan window")
 
     # Delete job button
     delete_job_btn = Button(job_list_btn_frame, text="Delete job", width=12, height=1,
                     command=job_list_delete_selected, activebackground='green',
-                    activeforeground='white', wraplength=100, font=("Arial", FontSize))
+                    activeforeground='white', wraplength=100, font=("Arial", FontSize), name='delete_job_btn')
     delete_job_btn.pack(side=TOP, padx=2, pady=2)
-    as_tooltips.add(delete_job_btn, "Delete currently selected job from list")
 
     # Rerun job button
     rerun_job_btn = Button(job_list_btn_frame, text="Rerun job", width=12, height=1,
                     command=job_list_rerun_selected, activebackground='green',
-                    activeforeground='white', wraplength=100, font=("Arial", FontSize))
+                    activeforeground='white', wraplength=100, font=("Arial", FontSize), name='rerun_job_btn')
     rerun_job_btn.pack(side=TOP, padx=2, pady=2)
-    as_tooltips.add(rerun_job_btn, "Toggle 'run' state of currently selected job in list")
 
     # Start processing job button
     start_batch_btn = Button(job_list_btn_frame, text="Start batch", width=12, height=1,
                     command=start_processing_job_list, activebackground='green',
-                    activeforeground='white', wraplength=100, font=("Arial", FontSize))
+                    activeforeground='white', wraplength=100, font=("Arial", FontSize), name='start_batch_btn')
     start_batch_btn.pack(side=TOP, padx=2, pady=2)
-    as_tooltips.add(start_batch_btn, "Start processing jobs in list")
 
     # Suspend on end checkbox
     # suspend_on_joblist_end = tk.BooleanVar(value=False)
@@ -4812,18 +5006,31 @@ def build_ui():
     suspend_on_completion_label = Label(job_list_btn_frame, text='Suspend on:', font=("Arial", FontSize))
     suspend_on_completion_label.pack(side=TOP, anchor=W, padx=2, pady=2)
     suspend_on_completion = StringVar()
-    suspend_on_batch_completion_rb = Radiobutton(job_list_btn_frame, text="Job completion",
-                                  variable=suspend_on_completion, value='job_completion', font=("Arial", FontSize))
-    suspend_on_batch_completion_rb.pack(side=TOP, anchor=W, padx=2, pady=2)
-    as_tooltips.add(suspend_on_batch_completion_rb, "Suspend computer when all jobs in list have been processed")
-    suspend_on_job_completion_rb = Radiobutton(job_list_btn_frame, text="Batch completion",
-                                  variable=suspend_on_completion, value='batch_completion', font=("Arial", FontSize))
+    suspend_on_job_completion_rb = Radiobutton(job_list_btn_frame, text="Job completion",
+                                  variable=suspend_on_completion, value='job_completion', font=("Arial", FontSize),
+                                  name='suspend_on_job_completion_rb')
     suspend_on_job_completion_rb.pack(side=TOP, anchor=W, padx=2, pady=2)
-    as_tooltips.add(suspend_on_batch_completion_rb, "Suspend computer when current job being processed is complete")
+    suspend_on_batch_completion_rb = Radiobutton(job_list_btn_frame, text="Batch completion",
+                                  variable=suspend_on_completion, value='batch_completion', font=("Arial", FontSize),
+                                  name='suspend_on_batch_completion_rb')
+    suspend_on_batch_completion_rb.pack(side=TOP, anchor=W, padx=2, pady=2)
     no_suspend_rb = Radiobutton(job_list_btn_frame, text="No suspend",
-                                  variable=suspend_on_completion, value='no_suspend', font=("Arial", FontSize))
+                                  variable=suspend_on_completion, value='no_suspend', font=("Arial", FontSize),
+                                  name='no_suspend_rb')
     no_suspend_rb.pack(side=TOP, anchor=W, padx=2, pady=2)
-    as_tooltips.add(suspend_on_batch_completion_rb, "Do not suspend when done")
+
+    # Tooltips for job list buttons, resolved by widget name in a single pass
+    job_list_tooltips = {
+        'add_job_btn': "Add to job list a new job using the current settings defined on the right area of the AfterScan window",
+        'delete_job_btn': "Delete currently selected job from list",
+        'rerun_job_btn': "Toggle 'run' state of currently selected job in list",
+        'start_batch_btn': "Start processing jobs in list",
+        'suspend_on_job_completion_rb': "Suspend computer when current job being processed is complete",
+        'suspend_on_batch_completion_rb': "Suspend computer when all jobs in list have been processed",
+        'no_suspend_rb': "Do not suspend when done"
+    }
+    for widget_name, tooltip_text in job_list_tooltips.items():
+        as_tooltips.add(job_list_btn_frame.nametowidget(widget_name), tooltip_text)
 
     suspend_on_completion.set("no_suspend")
 